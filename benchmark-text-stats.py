@@ -0,0 +1,126 @@
+import random
+import sys
+import time
+import numpy as np
+import textstat
+from textblob import TextBlob
+from lib.text_stats import BatchTextStats
+
+BASELINE_SAMPLE = 1000  # Per-article baseline is timed on this many articles and extrapolated
+SIGN_TOLERANCE = 0.05  # Polarities closer to 0 than this count as neutral when checking sign flips
+
+# Validation fails, and the script exits with status 1, beyond these limits
+MIN_READABILITY_MATCH = 1.0
+MAX_POLARITY_MAE = 0.001
+MAX_POLARITY_ERROR = 0.01
+MIN_POLARITY_CORRELATION = 0.999
+
+COMMON_WORDS = [
+    "the", "president", "said", "on", "a", "in", "administration", "of", "trade", "and", "to",
+    "officials", "policy", "court", "order", "tariffs", "with", "campaign", "state", "election",
+    "not", "no", "never", "very", "really", "economy", "senate", "house", "report", "week",
+    "isn't", "aren't", "didn't", "won't", "can't", "it's", "\"not", "good\"", "'very", "great'",
+    ":)", ":-(", "!!", "(!)", "\u201cgreat\u201d", "well-known",
+]
+
+# Hand-written texts with contractions, quotes and mixed negations
+NEWS_TEXTS = [
+    "Tariffs aren't great.",
+    "Tariffs aren't great, critics say. The deal is not good but the outcome was \"very good\" for markets.",
+    "The deal wasn't very good, officials said \"it isn't great\".",
+    "Officials didn't say the plan was bad. \"It's not a good plan,\" the senator said, \"and it never was.\"",
+    "The court's ruling won't be popular; no serious lawyer thinks it's 'very wrong', though.",
+    "He can't win, aides admitted. Still, it's a really important and surprisingly close race!",
+    "This is great!",
+    "Good news!!",
+    "The deal is really not good.",
+    "I am happy :)",
+    "Supporters cheered :-D while critics called the plan \u201cvery, very bad\u201d (!)",
+]
+
+def build_corpus(size, seed=42):
+    """
+    Builds a synthetic news corpus with lexicon words, negations and
+    sentence punctuation so every code path is exercised.
+    """
+    rng = random.Random(seed)
+    lexicon_words = sorted(BatchTextStats().lexicon)[:2000]
+    vocabulary = COMMON_WORDS * 20 + lexicon_words
+
+    corpus = []
+    for _ in range(size):
+        sentences = []
+        for _ in range(rng.randint(5, 25)):
+            words = rng.choices(vocabulary, k=rng.randint(3, 25))
+            words[0] = words[0].capitalize()
+            sentences.append(' '.join(words) + rng.choice(['.', '.', '.', '!', '?']))
+        corpus.append(' '.join(sentences))
+    return corpus
+
+def per_article_stats(texts):
+    """The current per-article computation in RankingEquation."""
+    polarity = [TextBlob(text).sentiment.polarity for text in texts]
+    readability = [textstat.flesch_reading_ease(text) for text in texts]
+    return np.array(polarity), np.array(readability)
+
+def validate(texts, label="articles"):
+    """
+    Compares batch output with TextBlob/textstat on the same texts.
+
+    Returns:
+        bool: True if every metric is within the limits above
+    """
+    batch = BatchTextStats().compute(texts)
+    polarity, readability = per_article_stats(texts)
+
+    readability_match = np.mean(np.isclose(batch['readability'], readability))
+    polarity_error = np.abs(batch['polarity'] - polarity)
+    correlation = np.corrcoef(batch['polarity'], polarity)[0, 1]
+    # Opposite signs where either side is clearly non-neutral
+    sign_flips = np.sum((batch['polarity'] * polarity < 0) &
+                        (np.maximum(np.abs(batch['polarity']), np.abs(polarity)) > SIGN_TOLERANCE))
+
+    print(f"🔎 Validation on {len(texts)} {label}")
+    print(f"   Readability exact match: {readability_match:.2%}")
+    print(f"   Polarity MAE: {polarity_error.mean():.4f}, max error: {polarity_error.max():.4f}, "
+          f"correlation: {correlation:.4f}, sign flips: {sign_flips}")
+
+    failures = []
+    if readability_match < MIN_READABILITY_MATCH:
+        failures.append(f"readability match {readability_match:.2%} < {MIN_READABILITY_MATCH:.2%}")
+    if polarity_error.mean() > MAX_POLARITY_MAE:
+        failures.append(f"polarity MAE {polarity_error.mean():.4f} > {MAX_POLARITY_MAE}")
+    if polarity_error.max() > MAX_POLARITY_ERROR:
+        failures.append(f"polarity max error {polarity_error.max():.4f} > {MAX_POLARITY_ERROR}")
+    if not correlation >= MIN_POLARITY_CORRELATION:
+        failures.append(f"polarity correlation {correlation:.4f} < {MIN_POLARITY_CORRELATION}")
+    if sign_flips:
+        failures.append(f"{sign_flips} polarity sign flips")
+    for failure in failures:
+        print(f"❌ {failure}")
+    return not failures
+
+def benchmark(size):
+    corpus = build_corpus(size)
+
+    sample = corpus[:BASELINE_SAMPLE]
+    start = time.perf_counter()
+    per_article_stats(sample)
+    per_article_time = (time.perf_counter() - start) * size / len(sample)
+
+    start = time.perf_counter()
+    BatchTextStats().compute(corpus)
+    batch_time = time.perf_counter() - start
+
+    print(f"⏱️ {size} articles: per-article ~{per_article_time:.1f}s (extrapolated), "
+          f"batch {batch_time:.1f}s, speedup {per_article_time / batch_time:.1f}x")
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+
+    valid = validate(NEWS_TEXTS, label="hand-written news texts")
+    valid = validate(build_corpus(BASELINE_SAMPLE, seed=7)) and valid
+    if not valid:
+        sys.exit(1)
+    for size in sizes:
+        benchmark(size)
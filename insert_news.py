@@ -1,13 +1,47 @@
+import os
 from datetime import datetime, UTC
 from lib.utils import Utility, DatabaseConnection
+from lib.blob_store import BlobStore
+from lib import profiling
 from news_scraper import fetch_news_by_date
 
+def positive_int_env(name):
+    """
+    Reads an optional positive integer from the environment.
+
+    Returns:
+        int or None: The value, or None if it is unset or invalid (with a warning)
+    """
+    raw = os.getenv(name)
+    if not raw:
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        print(f"⚠️ Ignoring invalid {name}={raw}, expected a positive integer")
+        return None
+    return value
+
 class NewsStorage:
     """Class for fetching and storing news in Supabase."""
     
     def __init__(self):
         self.utils = Utility(table_name="news")
         self.db = self.utils.db  # Use the DatabaseConnection instance from Utility
+
+        # Offloading inline base64 thumbnails is opt-in: rows get blob:// references
+        # that only resolve if BLOB_STORE_DIR is persistent and served to clients.
+        # Without it the data URI stays in image_url as before.
+        self.blob_store = None
+        blob_dir = os.getenv("BLOB_STORE_DIR")
+        if blob_dir:
+            self.blob_store = BlobStore(
+                blob_dir,
+                max_dimension=positive_int_env("BLOB_MAX_DIMENSION"),
+                compress_above=positive_int_env("BLOB_COMPRESS_ABOVE"),
+            )
     
     def save_news_by_date(self, target_date):
         """
@@ -19,7 +53,7 @@ class NewsStorage:
         Returns:
             Number of articles saved
         """
-        news = fetch_news_by_date(target_date) #news_scraper.py
+        news = fetch_news_by_date(target_date, self.blob_store) #news_scraper.py
         if not news:
             print(f"⚠️ No news fetched for {target_date}.")
             return 0
@@ -38,7 +72,8 @@ class NewsStorage:
 
             try:
                 # Use the database connection insert_record method
-                self.db.insert_record(data)
+                with profiling.stage(profiling.DB_IO):
+                    self.db.insert_record(data)
                 articles_saved += 1
             except Exception as e:
                 print(f"❌ Error inserting data for {target_date}: {e}")
@@ -77,11 +112,23 @@ class NewsStorage:
             return 0
 
 if __name__ == "__main__":
-    import sys
-    
-    # Parse command line arguments if provided
-    start_date_arg = sys.argv[1] if len(sys.argv) > 1 else None
-    end_date_arg = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    storage = NewsStorage()
-    storage.run(start_date_arg, end_date_arg)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch news for a date range and store it in Supabase")
+    parser.add_argument("start_date", nargs="?",
+                        help="First date to fetch, YYYY-MM-DD or 'today'/'t' (default: the utility's default range)")
+    parser.add_argument("end_date", nargs="?",
+                        help="Last date to fetch, YYYY-MM-DD (default: only start_date)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile CPU and memory per stage and save the results to --profile-dir")
+    parser.add_argument("--profile-dir",
+                        help="Where --profile writes its pstats file and report (default: $PROFILE_DIR or profiles)")
+    args = parser.parse_args()
+
+    if args.profile_dir and not args.profile:
+        parser.error("--profile-dir only applies to --profile")
+    profile_dir = args.profile_dir or os.getenv("PROFILE_DIR", "profiles")
+
+    with profiling.profile_run("insert_news", enabled=args.profile, output_dir=profile_dir):
+        storage = NewsStorage()
+        storage.run(args.start_date, args.end_date)
@@ -0,0 +1,155 @@
+import os
+import re
+import base64
+import hashlib
+from io import BytesIO
+
+BLOB_REF_PREFIX = "blob://"
+
+DATA_URI_PATTERN = re.compile(r'^data:(image/[a-zA-Z0-9.+-]+);base64,(.*)$', re.DOTALL)
+BLOB_NAME_PATTERN = re.compile(r'^[0-9a-f]{64}\.[a-z]+$')
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+class BlobStore:
+    """Content-addressed store for inline images, backed by a local directory."""
+
+    def __init__(self, root_dir, max_dimension=None, jpeg_quality=85, compress_above=None):
+        """
+        Args:
+            root_dir: Directory that holds the blobs
+            max_dimension: Optional longest-side limit in pixels; larger images are downscaled
+            jpeg_quality: JPEG quality used when an image is re-encoded
+            compress_above: Optional size in bytes; larger images are re-encoded as JPEG
+        """
+        self.root_dir = root_dir
+        self.max_dimension = max_dimension
+        self.jpeg_quality = jpeg_quality
+        self.compress_above = compress_above
+        self._warned_no_pillow = False
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    @staticmethod
+    def is_data_uri(value):
+        """Returns True if the value is a base64 image data URI."""
+        return isinstance(value, str) and DATA_URI_PATTERN.match(value) is not None
+
+    @staticmethod
+    def is_reference(value):
+        """Returns True if the value is a reference produced by this store."""
+        return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+    def _path_for(self, name):
+        # Shard by the first two hex characters to keep directories small
+        return os.path.join(self.root_dir, name[:2], name)
+
+    def _shrink(self, payload, mime_type):
+        """
+        Downscales and/or re-encodes an image if the store is configured to.
+        Falls back to the original bytes if Pillow is unavailable or decoding fails.
+        """
+        needs_compress = self.compress_above is not None and len(payload) > self.compress_above
+        if not self.max_dimension and not needs_compress:
+            return payload, mime_type
+
+        try:
+            from PIL import Image
+        except ImportError:
+            if not self._warned_no_pillow:
+                print("⚠️ BLOB_MAX_DIMENSION/BLOB_COMPRESS_ABOVE are set but Pillow is not installed; storing images unchanged")
+                self._warned_no_pillow = True
+            return payload, mime_type
+
+        try:
+            image = Image.open(BytesIO(payload))
+            resized = False
+            if self.max_dimension and max(image.size) > self.max_dimension:
+                image.thumbnail((self.max_dimension, self.max_dimension))
+                resized = True
+
+            if not resized and not needs_compress:
+                return payload, mime_type
+
+            buffer = BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=self.jpeg_quality, optimize=True)
+            encoded = buffer.getvalue()
+            if len(encoded) >= len(payload) and not resized:
+                return payload, mime_type
+            return encoded, "image/jpeg"
+        except Exception as e:
+            print(f"⚠️ Could not shrink inline image, storing original: {e}")
+            return payload, mime_type
+
+    def put(self, payload, mime_type="image/jpeg"):
+        """
+        Writes bytes to the store, deduplicating by SHA-256 of the stored content.
+
+        Args:
+            payload (bytes): Raw image bytes
+            mime_type (str): MIME type of the payload
+
+        Returns:
+            str: Reference of the form blob://<sha256>.<ext>
+        """
+        payload, mime_type = self._shrink(payload, mime_type)
+        digest = hashlib.sha256(payload).hexdigest()
+        name = f"{digest}.{EXTENSIONS.get(mime_type, 'bin')}"
+        path = self._path_for(name)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+        return f"{BLOB_REF_PREFIX}{name}"
+
+    def put_data_uri(self, data_uri):
+        """
+        Decodes a base64 image data URI and stores it.
+
+        Args:
+            data_uri (str): A string like data:image/jpeg;base64,/9j/...
+
+        Returns:
+            str: Blob reference, or the original value if it is not a valid data URI
+        """
+        match = DATA_URI_PATTERN.match(data_uri or "")
+        if not match:
+            return data_uri
+
+        mime_type, encoded = match.groups()
+        try:
+            payload = base64.b64decode(encoded, validate=False)
+        except (ValueError, TypeError) as e:
+            print(f"⚠️ Invalid base64 thumbnail, keeping inline value: {e}")
+            return data_uri
+
+        return self.put(payload, mime_type)
+
+    def get(self, reference):
+        """
+        Reads the bytes behind a blob reference.
+
+        Args:
+            reference (str): A blob://... reference
+
+        Returns:
+            bytes: The stored content, or None if it does not exist
+        """
+        if not self.is_reference(reference):
+            return None
+        name = reference[len(BLOB_REF_PREFIX):]
+        if not BLOB_NAME_PATTERN.match(name):
+            return None
+        path = self._path_for(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
@@ -1,17 +1,31 @@
 from datetime import datetime, UTC
 import numpy as np
 import textstat
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer, TfidfVectorizer
 from textblob import TextBlob
 from rake_nltk import Rake
+from lib.text_stats import BatchTextStats
+from lib import profiling
 import language_tool_python
 import nltk
 nltk.download('stopwords')
 nltk.download('punkt_tab')
 
+KEYWORD_MODES = ('rake', 'tfidf')
+TEXT_STATS_MODES = ('article', 'batch')
+SCORE_FIELDS = (
+    'uniqueness_score', 'engagement_score', 'recency_score', 'verified_score',
+    'content_score', 'legitimacy_score', 'downvote_penalty', 'final_score',
+)
+
 class RankingEquation:
-    def __init__(self, id, full_text, title, source, published_at, upvotes, downvotes, shares, comments):
-        self.id = id 
+    def __init__(self, id, full_text, title, source, published_at, upvotes, downvotes, shares, comments, keyword_mode='rake', text_stats_mode='article'):
+        if keyword_mode not in KEYWORD_MODES:
+            raise ValueError(f"Unknown keyword_mode '{keyword_mode}', expected one of {KEYWORD_MODES}")
+        if text_stats_mode not in TEXT_STATS_MODES:
+            raise ValueError(f"Unknown text_stats_mode '{text_stats_mode}', expected one of {TEXT_STATS_MODES}")
+
+        self.id = id
         self.full_text = full_text
         self.title = title
         self.source = source
@@ -20,12 +34,17 @@ class RankingEquation:
         self.downvotes = downvotes
         self.shares = shares
         self.comments = comments
+        self.keyword_mode = keyword_mode
+        self.text_stats_mode = text_stats_mode
 
-        self.sentiment = self.analyze_sentiment()
-        self.keywords = self.extract_keywords()
+        # In 'batch' mode sentiment and readability are filled in by rank_articles for the whole corpus
+        batch_stats = text_stats_mode == 'batch'
+        self.sentiment = 0 if batch_stats else self.analyze_sentiment()
+        # In 'tfidf' mode keywords are filled in by rank_articles from the shared TF-IDF matrix
+        self.keywords = self.extract_keywords() if keyword_mode == 'rake' else ''
         self.grammar_errors = self.check_grammar()
 
-        self.readability = textstat.flesch_reading_ease(self.full_text)
+        self.readability = 0 if batch_stats else textstat.flesch_reading_ease(self.full_text)
         self.grammar_quality = max(0, 10 - self.grammar_errors)
         self.headings_count = self.full_text.count('<h')
         self.keyword_density = len(self.keywords.split()) / max(1, len(self.full_text.split()))
@@ -40,6 +59,22 @@ class RankingEquation:
         self.downvote_penalty = 0
         self.final_score = 0
 
+    @classmethod
+    def from_scores(cls, id, scores):
+        """
+        Rebuilds an article from previously computed scores without re-running the NLP steps.
+        Only the compute_* methods that do not need the text can be used on it.
+        """
+        article = cls.__new__(cls)
+        article.id = id
+        for field in SCORE_FIELDS:
+            setattr(article, field, scores.get(field, 0))
+        return article
+
+    def get_scores(self):
+        """Returns the score components, as accepted by from_scores."""
+        return {field: float(getattr(self, field)) for field in SCORE_FIELDS}
+
     def analyze_sentiment(self):
         blob = TextBlob(self.full_text)
         return blob.sentiment.polarity
@@ -50,6 +85,58 @@ class RankingEquation:
         keywords = rake.get_ranked_phrases()[:10]
         return ' '.join(keywords)
 
+    @staticmethod
+    def fit_tfidf(texts, max_df=0.9):
+        """
+        Fits TF-IDF on texts and keeps the raw term counts for keyword extraction.
+
+        The matrix is the same as TfidfVectorizer(stop_words='english', min_df=1, max_df=max_df)
+        gives, the counts come from the same single tokenization pass.
+
+        Returns:
+            tuple: (fitted CountVectorizer, term counts, TF-IDF matrix)
+        """
+        vectorizer = CountVectorizer(stop_words='english', min_df=1, max_df=max_df)
+        counts = vectorizer.fit_transform(texts)
+        return vectorizer, counts, TfidfTransformer().fit_transform(counts)
+
+    @staticmethod
+    def extract_corpus_keywords(articles, vectorizer, tfidf_matrix, counts, top_n=10):
+        """
+        Sets keywords and keyword_density for articles from an already fitted TF-IDF matrix.
+
+        Keywords are the top_n terms of every row by TF-IDF weight, selected in a
+        single sort over the non-zero entries, so no article is tokenized again.
+        keyword_density is the number of occurrences of those terms over the
+        number of words, like RAKE's words in its top phrases over the number of words.
+
+        Args:
+            articles: RankingEquation objects, in the same order as the matrix rows
+            vectorizer: The fitted vectorizer, for the term names
+            tfidf_matrix: TF-IDF matrix from fit_tfidf
+            counts: Term counts from fit_tfidf, rows in the same order
+            top_n: Number of terms to keep per article
+        """
+        csr = tfidf_matrix.tocsr()
+        row_lengths = np.diff(csr.indptr)
+        rows = np.repeat(np.arange(csr.shape[0]), row_lengths)
+
+        # Sort entries by row, then by descending weight, and keep the first top_n per row
+        order = np.lexsort((-csr.data, rows))
+        rank_in_row = np.arange(order.size) - csr.indptr[rows[order]]
+        keep = order[rank_in_row < top_n]
+
+        feature_names = vectorizer.get_feature_names_out()
+        kept_terms = feature_names[csr.indices[keep]]
+        kept_counts = np.asarray(counts.tocsr()[rows[keep], csr.indices[keep]]).ravel()
+        occurrences = np.bincount(rows[keep], weights=kept_counts, minlength=csr.shape[0])
+        terms_per_row = np.minimum(row_lengths, top_n)
+        bounds = np.concatenate(([0], np.cumsum(terms_per_row)))
+
+        for i, article in enumerate(articles):
+            article.keywords = ' '.join(kept_terms[bounds[i]:bounds[i + 1]])
+            article.keyword_density = occurrences[i] / max(1, len(article.full_text.split()))
+
     def check_grammar(self):
         tool = language_tool_python.LanguageTool('en-US')
         matches = tool.check(self.full_text)
@@ -126,21 +213,61 @@ class RankingEquation:
                             weights['legitimacy'] * self.legitimacy_score -
                             weights['downvote'] * self.downvote_penalty)
 
+    def compute_scores(self, weights, trusted_sources, domain_scores):
+        """Computes every score except uniqueness, then the final score."""
+        self.compute_engagement_score()
+        self.compute_recency_score()
+        self.compute_verified_source_score(trusted_sources)
+        self.compute_content_score()
+        self.compute_legitimacy_score(domain_scores)
+        self.compute_downvote_penalty()
+        self.compute_final_score(weights)
+
+    @staticmethod
+    def compute_corpus_features(articles, vectorizer=None, tfidf_matrix=None, counts=None):
+        """
+        Fills the features that are computed for many articles at once:
+        TF-IDF keywords and batch sentiment/readability.
+
+        Args:
+            articles: RankingEquation objects
+            vectorizer: Vectorizer from fit_tfidf; without it articles with keyword_mode='tfidf' keep empty keywords
+            tfidf_matrix: TF-IDF matrix from fit_tfidf, rows in the same order as articles
+            counts: Term counts from fit_tfidf, rows in the same order as articles
+        """
+        tfidf_indexes = [i for i, article in enumerate(articles) if article.keyword_mode == 'tfidf']
+        if tfidf_indexes and vectorizer is not None:
+            RankingEquation.extract_corpus_keywords(
+                [articles[i] for i in tfidf_indexes], vectorizer,
+                tfidf_matrix[tfidf_indexes], counts[tfidf_indexes]
+            )
+
+        batch_articles = [article for article in articles if article.text_stats_mode == 'batch']
+        if batch_articles:
+            stats = BatchTextStats().compute([article.full_text for article in batch_articles])
+            for article, polarity, readability in zip(batch_articles, stats['polarity'], stats['readability']):
+                article.sentiment = float(polarity)
+                article.readability = float(readability)
+
     @staticmethod
     def rank_articles(articles, weights, trusted_sources, domain_scores):
+        """
+        Scores every article and returns them best first.
+
+        Per-date top N selection for serving is done by RankingSnapshot.
+        """
         all_texts = [article.full_text for article in articles]
 
-        vectorizer = TfidfVectorizer(stop_words='english', min_df=1, max_df=0.9)
-        tfidf_matrix = vectorizer.fit_transform(all_texts)
+        vectorizer, counts, tfidf_matrix = RankingEquation.fit_tfidf(all_texts)
+
+        with profiling.stage(profiling.NLP):
+            RankingEquation.compute_corpus_features(articles, vectorizer, tfidf_matrix, counts)
+
+        with profiling.stage(profiling.UNIQUENESS):
+            for article in articles:
+                article.compute_uniqueness(all_texts, vectorizer, tfidf_matrix)
 
         for article in articles:
-            article.compute_uniqueness(all_texts, vectorizer, tfidf_matrix)
-            article.compute_engagement_score()
-            article.compute_recency_score()
-            article.compute_verified_source_score(trusted_sources)
-            article.compute_content_score()
-            article.compute_legitimacy_score(domain_scores)
-            article.compute_downvote_penalty()
-            article.compute_final_score(weights)
-
-        return sorted(articles, key=lambda x: x.final_score, reverse=True)
\ No newline at end of file
+            article.compute_scores(weights, trusted_sources, domain_scores)
+
+        return sorted(articles, key=lambda x: x.final_score, reverse=True)
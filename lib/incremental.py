@@ -0,0 +1,398 @@
+import os
+import json
+import hashlib
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from lib.equation import RankingEquation
+from lib import profiling
+
+# Row columns cached per article; a row whose text and these columns are unchanged is skipped
+CACHED_FIELDS = ("published_at", "upvote", "downvote", "share_count", "comment_count")
+
+# Cached scores with a recency above this are refreshed every run. Recency decays
+# below it within a few hours, after which a frozen value moves final_score by
+# less than weights['recency'] * RECENCY_REFRESH_THRESHOLD
+RECENCY_REFRESH_THRESHOLD = 1e-4
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def cached_fields(row):
+    return {field: row.get(field, 0) for field in CACHED_FIELDS}
+
+class IncrementalRanker:
+    """
+    Re-scores only the rows changed since the last run.
+
+    A state directory keeps the change watermark, a hashed term-count index of
+    every article and the last score components and engagement counts. Rows
+    whose text is unchanged (new votes, shares or comments) are re-scored from
+    cached components with no NLP. New or edited texts are analysed and compared
+    against the index. Their neighbours' uniqueness is updated when a changed
+    article becomes, or stops being, their most similar article.
+
+    Fetched rows whose text and engagement counts match the cache, such as rows
+    whose only change was the score written by the previous run, are skipped,
+    and scores that did not move are not written back.
+
+    Recency is refreshed every run for articles whose cached recency is still
+    above RECENCY_REFRESH_THRESHOLD; older articles keep their last recency.
+    IDF weights drift as the table grows; run with rebuild=True now and then to
+    rescore everything from scratch.
+    """
+
+    def __init__(self, db, build_article, weights, trusted_sources, domain_scores, state_dir,
+                 watermark_column="updated_at", page_size=1000, memory_budget_mb=256,
+                 n_features=2**20, max_df=0.9):
+        """
+        Args:
+            db: DatabaseConnection for the articles table
+            build_article: Function turning a row into a RankingEquation (or None to skip it)
+            weights, trusted_sources, domain_scores: Same as RankingEquation.rank_articles
+            state_dir: Directory where the watermark and index are persisted
+            watermark_column: Column updated on every change to a row
+            page_size: Maximum rows fetched per request
+            memory_budget_mb: Upper bound for one block of similarities
+            n_features: Width of the hashed feature space
+            max_df: Terms in more than this share of documents are ignored
+        """
+        self.db = db
+        self.build_article = build_article
+        self.weights = weights
+        self.trusted_sources = trusted_sources
+        self.domain_scores = domain_scores
+        self.state_dir = state_dir
+        self.watermark_column = watermark_column
+        self.page_size = page_size
+        self.memory_budget_mb = memory_budget_mb
+        self.n_features = n_features
+        self.max_df = max_df
+
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, stop_words='english', alternate_sign=False, norm=None
+        )
+
+    def _state_path(self, name):
+        return os.path.join(self.state_dir, name)
+
+    def _empty_state(self):
+        return {
+            "watermark": None,
+            "ids": [],
+            "articles": [],
+            "counts": sparse.csr_matrix((0, self.n_features)),
+            "max_similarity": np.zeros(0),
+            "nearest": np.zeros(0, dtype=np.int64),
+        }
+
+    def _load_state(self):
+        """Loads the persisted state, or an empty one on the first run."""
+        if not os.path.exists(self._state_path("state.json")):
+            return self._empty_state()
+
+        with open(self._state_path("state.json")) as f:
+            state = json.load(f)
+        arrays = np.load(self._state_path("similarity.npz"))
+        state["counts"] = sparse.load_npz(self._state_path("index.npz")).tocsr()
+        state["max_similarity"] = arrays["max_similarity"]
+        state["nearest"] = arrays["nearest"]
+        return state
+
+    def _save_state(self, state):
+        """Writes the state, replacing the previous files only once all are written."""
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        sparse.save_npz(self._state_path("index.tmp.npz"), state["counts"])
+        np.savez(self._state_path("similarity.tmp.npz"),
+                 max_similarity=state["max_similarity"], nearest=state["nearest"])
+        with open(self._state_path("state.tmp.json"), "w") as f:
+            json.dump({key: state[key] for key in ("watermark", "ids", "articles")}, f)
+
+        os.replace(self._state_path("index.tmp.npz"), self._state_path("index.npz"))
+        os.replace(self._state_path("similarity.tmp.npz"), self._state_path("similarity.npz"))
+        os.replace(self._state_path("state.tmp.json"), self._state_path("state.json"))
+
+    def _fetch_changed_rows(self, watermark):
+        """
+        Fetches rows after the watermark, in (watermark column, id) order.
+
+        Args:
+            watermark: [column value, id] of the last row handled, or None for every row.
+                A bare column value from older state files is fetched inclusively.
+        """
+        if watermark is None:
+            value, after = None, None
+        elif isinstance(watermark, list):
+            value, after = None, tuple(watermark)
+        else:
+            value, after = watermark, None
+
+        rows = []
+        while True:
+            with profiling.stage(profiling.DB_IO):
+                page = self.db.fetch_changed_since(
+                    self.watermark_column, value, limit=self.page_size, after=after
+                )
+            if not page:
+                break
+            rows.extend(page)
+            after = (page[-1][self.watermark_column], page[-1]['id'])
+        return rows
+
+    def _rescore_engagement(self, row, scores):
+        """Re-scores an article whose text did not change from its cached components."""
+        article = RankingEquation.from_scores(row['id'], scores)
+        article.published_at = row['published_at']
+        article.upvotes = row.get('upvote', 0)
+        article.downvotes = row.get('downvote', 0)
+        article.shares = row.get('share_count', 0)
+        article.comments = row.get('comment_count', 0)
+
+        article.compute_engagement_score()
+        article.compute_recency_score()
+        article.compute_downvote_penalty()
+        article.compute_final_score(self.weights)
+        return article
+
+    def _analyze_texts(self, rows):
+        """Runs the full per-article analysis for new or edited rows."""
+        articles = [article for article in map(self.build_article, rows) if article is not None]
+
+        vectorizer, counts, tfidf_matrix = None, None, None
+        if any(article.keyword_mode == 'tfidf' for article in articles):
+            # Keywords come from the changed texts only; hashed features have no names
+            try:
+                vectorizer, counts, tfidf_matrix = RankingEquation.fit_tfidf(
+                    [article.full_text for article in articles], max_df=1.0
+                )
+            except ValueError as e:
+                print(f"⚠️ No keywords for the changed articles: {e}")
+        RankingEquation.compute_corpus_features(articles, vectorizer, tfidf_matrix, counts)
+
+        for article in articles:
+            article.compute_scores(self.weights, self.trusted_sources, self.domain_scores)
+        return articles
+
+    def _update_index(self, state, articles):
+        """
+        Adds or replaces the hashed counts of the given articles.
+
+        Returns:
+            list: Index positions of the articles, in order
+        """
+        position_of = {article_id: i for i, article_id in enumerate(state["ids"])}
+        counts = self.vectorizer.transform([article.full_text for article in articles]).tocsr()
+
+        positions = []
+        new_rows, edited_rows = [], []
+        for i, article in enumerate(articles):
+            if article.id in position_of:
+                positions.append(position_of[article.id])
+                edited_rows.append(i)
+            else:
+                positions.append(len(state["ids"]) + len(new_rows))
+                new_rows.append(i)
+
+        if edited_rows:
+            # Zero the old rows and add the new counts at the same positions
+            n_documents = state["counts"].shape[0]
+            edited_positions = [positions[i] for i in edited_rows]
+            keep = np.ones(n_documents)
+            keep[edited_positions] = 0
+            placement = sparse.csr_matrix(
+                (np.ones(len(edited_rows)), (edited_positions, np.arange(len(edited_rows)))),
+                shape=(n_documents, len(edited_rows)),
+            )
+            state["counts"] = (sparse.diags(keep) @ state["counts"] + placement @ counts[edited_rows]).tocsr()
+
+        if new_rows:
+            state["ids"].extend(articles[i].id for i in new_rows)
+            state["articles"].extend({} for _ in new_rows)
+            state["counts"] = sparse.vstack([state["counts"], counts[new_rows]]).tocsr()
+            state["max_similarity"] = np.concatenate([state["max_similarity"], np.zeros(len(new_rows))])
+            state["nearest"] = np.concatenate([state["nearest"], np.full(len(new_rows), -1, dtype=np.int64)])
+
+        return positions
+
+    def _block_rows(self, n_columns):
+        budget_bytes = self.memory_budget_mb * 1024 * 1024
+        return max(1, int(budget_bytes // (16 * max(1, n_columns))))
+
+    def _refresh_similarities(self, state, changed_positions):
+        """
+        Updates max similarity for changed articles and the neighbours they affect.
+
+        Returns:
+            set: Positions of unchanged articles whose uniqueness changed
+        """
+        counts = state["counts"]
+        n_documents = counts.shape[0]
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        idf = np.log((1 + n_documents) / (1 + document_frequency)) + 1
+        idf[document_frequency > self.max_df * n_documents] = 0
+        tfidf = normalize(counts.multiply(idf).tocsr())
+
+        changed = np.array(sorted(set(changed_positions)), dtype=np.int64)
+        is_changed = np.zeros(n_documents, dtype=bool)
+        is_changed[changed] = True
+
+        # Neighbours whose nearest article changed text are recomputed from scratch
+        previous_nearest = state["nearest"]
+        stale = np.flatnonzero(~is_changed & (previous_nearest >= 0) & is_changed[np.maximum(previous_nearest, 0)])
+        recompute = np.concatenate([changed, stale])
+
+        max_similarity = state["max_similarity"]
+        nearest = state["nearest"]
+        old_max_similarity = max_similarity.copy()
+        best_from_changed = np.zeros(n_documents)
+        best_changed_position = np.full(n_documents, -1, dtype=np.int64)
+
+        block = self._block_rows(n_documents)
+        for start in range(0, len(recompute), block):
+            rows = recompute[start:start + block]
+            similarities = (tfidf[rows] @ tfidf.T).toarray()
+            similarities[np.arange(len(rows)), rows] = -1
+
+            best = similarities.argmax(axis=1)
+            best_value = similarities[np.arange(len(rows)), best]
+            max_similarity[rows] = np.maximum(best_value, 0)
+            nearest[rows] = np.where(best_value > 0, best, -1)
+
+            # Changed articles can become the nearest neighbour of any other article
+            changed_in_block = is_changed[rows]
+            if changed_in_block.any():
+                from_changed = similarities[changed_in_block]
+                column_best = from_changed.argmax(axis=0)
+                column_value = from_changed[column_best, np.arange(n_documents)]
+                improved = column_value > best_from_changed
+                best_from_changed[improved] = column_value[improved]
+                best_changed_position[improved] = rows[changed_in_block][column_best[improved]]
+
+        affected = set(stale.tolist())
+        raised = ~is_changed & (best_from_changed > max_similarity)
+        raised[stale] = False
+        max_similarity[raised] = best_from_changed[raised]
+        nearest[raised] = best_changed_position[raised]
+        affected.update(np.flatnonzero(raised).tolist())
+
+        # Recomputed neighbours whose value did not move need no new score
+        return {p for p in affected if not np.isclose(max_similarity[p], old_max_similarity[p])}
+
+    def run(self, rebuild=False):
+        """
+        Re-scores rows changed since the last watermark.
+
+        Args:
+            rebuild: Ignore any saved state and score the whole table
+
+        Returns:
+            int: Number of articles updated
+        """
+        state = self._empty_state() if rebuild else self._load_state()
+
+        fetched = self._fetch_changed_rows(state["watermark"])
+        # Keep the latest version of rows that moved between pages while fetching
+        rows = {}
+        for row in fetched:
+            if isinstance(row.get('full_text'), str):
+                rows[row['id']] = row
+        rows = list(rows.values())
+
+        position_of = {article_id: i for i, article_id in enumerate(state["ids"])}
+        engagement_rows, text_rows = [], []
+        unchanged_count = 0
+        for row in rows:
+            position = position_of.get(row['id'])
+            cached = state["articles"][position] if position is not None else {}
+            if cached.get("text_hash") != text_hash(row['full_text']):
+                text_rows.append(row)
+            elif cached.get("fields") != cached_fields(row):
+                engagement_rows.append(row)
+            else:
+                unchanged_count += 1
+
+        print(f"📋 {len(rows)} fetched articles: {len(engagement_rows)} engagement only, "
+              f"{len(text_rows)} new or edited, {unchanged_count} unchanged")
+
+        updated = {}
+        fields_of = {}  # position -> cached fields to store once the score is written
+        for row in engagement_rows:
+            position = position_of[row['id']]
+            updated[position] = self._rescore_engagement(row, state["articles"][position]["scores"])
+            fields_of[position] = cached_fields(row)
+
+        affected = set()
+        with profiling.stage(profiling.NLP):
+            analyzed = self._analyze_texts(text_rows)
+        if analyzed:
+            rows_by_id = {row['id']: row for row in text_rows}
+            positions = self._update_index(state, analyzed)
+            for position, article in zip(positions, analyzed):
+                updated[position] = article
+                fields_of[position] = cached_fields(rows_by_id[article.id])
+                # Invalidate until the new score is written
+                state["articles"][position] = {}
+            with profiling.stage(profiling.UNIQUENESS):
+                affected = self._refresh_similarities(state, positions) - set(updated)
+
+        # Articles young enough for recency to still move are refreshed from the cache
+        recent = {
+            position for position, entry in enumerate(state["articles"])
+            if position not in updated and "fields" in entry
+            and entry["scores"].get("recency_score", 0) > RECENCY_REFRESH_THRESHOLD
+        }
+
+        # New uniqueness for changed articles and for neighbours that were not fetched
+        for position, article in updated.items():
+            article.uniqueness_score = 1 - state["max_similarity"][position]
+            article.compute_final_score(self.weights)
+        for position in affected | recent:
+            entry = state["articles"][position]
+            if "scores" not in entry:
+                continue
+            if "fields" in entry:
+                row = {"id": state["ids"][position], **entry["fields"]}
+                article = self._rescore_engagement(row, entry["scores"])
+            else:
+                article = RankingEquation.from_scores(state["ids"][position], entry["scores"])
+            article.uniqueness_score = 1 - state["max_similarity"][position]
+            article.compute_final_score(self.weights)
+            updated[position] = article
+
+        update_count = 0
+        skipped_count = 0
+        failed_ids = set()
+        for position, article in updated.items():
+            entry = state["articles"][position]
+            previous_score = entry.get("scores", {}).get("final_score")
+            try:
+                if previous_score is not None and np.isclose(article.final_score, previous_score, rtol=0, atol=1e-9):
+                    skipped_count += 1
+                else:
+                    with profiling.stage(profiling.DB_IO):
+                        self.db.update_record(article.id, {"article_score": article.final_score})
+                    update_count += 1
+                entry["scores"] = article.get_scores()
+                if position in fields_of:
+                    entry["fields"] = fields_of[position]
+                if hasattr(article, "full_text"):
+                    entry["text_hash"] = text_hash(article.full_text)
+            except Exception as e:
+                print(f"❌ Error updating article ID {article.id}: {e}")
+                failed_ids.add(article.id)
+
+        # The watermark is the last fetched row before the first failed one, so
+        # failed rows are fetched again next run; rows after it are cheap to revisit
+        watermark = state["watermark"]
+        for row in fetched:
+            if row['id'] in failed_ids:
+                break
+            watermark = [row[self.watermark_column], row['id']]
+        state["watermark"] = watermark
+        self._save_state(state)
+
+        print(f"✅ Updated {update_count} articles ({len(affected)} neighbours, {len(recent)} recency refreshes), "
+              f"{skipped_count} unchanged scores not written, watermark {state['watermark']}")
+        return update_count
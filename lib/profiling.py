@@ -0,0 +1,171 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, UTC
+
+# Stage names used by the batch jobs
+SCRAPING = "scraping"
+IMAGE_RESOLUTION = "image resolution"
+NLP = "nlp"
+UNIQUENESS = "uniqueness"
+DB_IO = "db io"
+
+_NULL_STAGE = nullcontext()
+_active = None  # The RunProfiler of the current run, None when profiling is off
+
+class StageStats:
+    """Accumulated time and memory for one stage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.top_sites = []
+
+class RunProfiler:
+    """CPU (cProfile) and memory (tracemalloc) profile of one batch run, split into stages."""
+
+    def __init__(self, name, output_dir="profiles", top_n=25, traceback_depth=1):
+        self.name = name
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.traceback_depth = traceback_depth
+        self.stages = {}
+        self._stack = []  # [start time, snapshot overhead at start, peak seen so far] of open stages
+        self._profile = cProfile.Profile()
+        self._baseline = None
+        self._run_peak = 0
+        self._snapshot_seconds = 0.0  # Time spent in our own snapshots, excluded from stage times
+        self._ignored_files = {tracemalloc.__file__, __file__}
+
+    def _allocation_sites(self):
+        """Top allocation sites grown since the start of the run, without the profiler's own."""
+        # Snapshots are not part of the run, keep them out of the CPU profile
+        self._profile.disable()
+        try:
+            differences = tracemalloc.take_snapshot().compare_to(self._baseline, "lineno")
+            return [site for site in differences
+                    if site.traceback[0].filename not in self._ignored_files][:10]
+        finally:
+            self._profile.enable()
+
+    def start(self):
+        tracemalloc.start(self.traceback_depth)
+        self._baseline = tracemalloc.take_snapshot()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        peak = max(self._run_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        return peak
+
+    @contextmanager
+    def stage(self, name):
+        """Records time and peak traced memory of a block of work."""
+        # Keep the peak reached so far before resetting it for this stage
+        peak_before = tracemalloc.get_traced_memory()[1]
+        self._run_peak = max(self._run_peak, peak_before)
+        if self._stack:
+            self._stack[-1][2] = max(self._stack[-1][2], peak_before)
+        tracemalloc.reset_peak()
+        entry = [time.perf_counter(), self._snapshot_seconds, 0]
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            peak = max(entry[2], tracemalloc.get_traced_memory()[1])
+            self._run_peak = max(self._run_peak, peak)
+            stats = self.stages.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - entry[0] - (self._snapshot_seconds - entry[1])
+
+            # Allocation sites are captured only when a stage reaches a new peak,
+            # so repeated per-article stages take few snapshots
+            if peak > stats.peak_bytes:
+                stats.peak_bytes = peak
+                snapshot_start = time.perf_counter()
+                stats.top_sites = self._allocation_sites()
+                self._snapshot_seconds += time.perf_counter() - snapshot_start
+
+            if self._stack:
+                self._stack[-1][2] = max(self._stack[-1][2], peak)
+
+    def write(self, peak_bytes):
+        """
+        Writes the pstats file and a text report.
+
+        Returns:
+            tuple: (pstats path, report path)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}-{datetime.now(UTC).strftime('%Y%m%dT%H%M%SZ')}")
+        stats_path = f"{prefix}.pstats"
+        report_path = f"{prefix}-report.txt"
+        self._profile.dump_stats(stats_path)
+
+        report = io.StringIO()
+        report.write(f"Profile of {self.name}\n")
+        report.write(f"Peak traced memory: {peak_bytes / 1024 / 1024:.1f} MiB\n\n")
+
+        report.write("Stages (inclusive of nested stages)\n")
+        for name, stats in sorted(self.stages.items(), key=lambda item: -item[1].seconds):
+            report.write(f"  {name:<18} calls={stats.calls:<6} time={stats.seconds:9.3f}s "
+                         f"peak={stats.peak_bytes / 1024 / 1024:8.1f} MiB\n")
+
+        for name, stats in self.stages.items():
+            report.write(f"\nTop allocation sites at the {name} peak (growth since start of run)\n")
+            for site in stats.top_sites:
+                report.write(f"  {site}\n")
+
+        for sort_key in ("cumulative", "tottime"):
+            report.write(f"\nTop {self.top_n} functions by {sort_key}\n")
+            pstats.Stats(self._profile, stream=report).sort_stats(sort_key).print_stats(self.top_n)
+
+        with open(report_path, "w") as f:
+            f.write(report.getvalue())
+
+        return stats_path, report_path
+
+def stage(name):
+    """
+    Marks a block of work as a profiling stage.
+
+    Returns a shared no-op context when profiling is off, so leaving stages
+    in the code costs one function call.
+    """
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name)
+
+@contextmanager
+def profile_run(name, enabled=False, output_dir="profiles", top_n=25):
+    """
+    Profiles the enclosed run if enabled and writes its artifacts to output_dir.
+
+    Args:
+        name: Prefix of the artifact files
+        enabled: Does nothing when False
+        output_dir: Directory for the pstats file and report
+        top_n: Number of functions listed in the report
+    """
+    global _active
+    if not enabled:
+        yield None
+        return
+
+    profiler = RunProfiler(name, output_dir=output_dir, top_n=top_n)
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        peak = profiler.stop()
+        _active = None
+        stats_path, report_path = profiler.write(peak)
+        print(f"📈 Profile written to {stats_path} and {report_path}")
@@ -0,0 +1,142 @@
+import os
+import json
+import heapq
+import mmap
+from datetime import datetime, UTC
+from itertools import count
+
+SNAPSHOT_VERSION = 2
+
+# Row columns left out of snapshot records; everything else is kept for the reader to render
+SKIPPED_FIELDS = ("full_text",)
+
+def article_date(published_at):
+    """Returns the YYYY-MM-DD date of an ISO string or UTC timestamp."""
+    if isinstance(published_at, str):
+        return published_at[:10]
+    return datetime.fromtimestamp(published_at, UTC).strftime("%Y-%m-%d")
+
+class RankingSnapshot:
+    """
+    Keeps the top N ranked articles per date and writes them to a JSON lines file.
+
+    The first line is a header with the format version and the byte range of
+    every date, relative to the end of the header. Readers can then slice one
+    date out of a memory-mapped file without parsing the rest.
+    """
+
+    def __init__(self, top_n=20):
+        self.top_n = top_n
+        self._heaps = {}  # date -> min-heap of (score, tie breaker, record)
+        self._counter = count()
+
+    def add(self, article, row=None):
+        """
+        Offers a scored RankingEquation; it is kept only if it is in its date's top N.
+
+        Args:
+            article: Scored RankingEquation
+            row: The database row the article was built from. Its columns, except
+                SKIPPED_FIELDS, are stored so the snapshot can be served on its own
+        """
+        score = round(float(article.final_score), 6)
+        heap = self._heaps.setdefault(article_date(article.published_at), [])
+        if len(heap) >= self.top_n and score <= heap[0][0]:
+            return
+
+        record = {key: value for key, value in (row or {}).items() if key not in SKIPPED_FIELDS}
+        record.setdefault("title", article.title)
+        record.setdefault("source", article.source)
+        record["id"] = article.id
+        record["score"] = score
+        entry = (score, next(self._counter), record)
+
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heapreplace(heap, entry)
+
+    def add_all(self, articles, rows_by_id=None):
+        """Offers every article, with its row looked up by id in rows_by_id."""
+        rows_by_id = rows_by_id or {}
+        for article in articles:
+            self.add(article, rows_by_id.get(article.id))
+
+    def write(self, path):
+        """
+        Writes the snapshot atomically.
+
+        Returns:
+            int: Number of articles written
+        """
+        body = []
+        dates = {}
+        offset = 0
+        for date in sorted(self._heaps, reverse=True):
+            ranked = sorted(self._heaps[date], key=lambda entry: (-entry[0], entry[1]))
+            start = offset
+            for rank, (_, _, record) in enumerate(ranked, 1):
+                line = json.dumps({**record, "date": date, "rank": rank}, separators=(",", ":")) + "\n"
+                line = line.encode("utf-8")
+                body.append(line)
+                offset += len(line)
+            dates[date] = [start, offset]
+
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "generated_at": datetime.now(UTC).isoformat(),
+            "top_n": self.top_n,
+            "dates": dates,
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.writelines(body)
+        os.replace(tmp_path, path)
+
+        print(f"📸 Wrote snapshot of {len(body)} articles for {len(dates)} dates to {path}")
+        return len(body)
+
+    @staticmethod
+    def read_date(path, date):
+        """
+        Reads the ranked articles of one date from a snapshot file.
+
+        Args:
+            path: Snapshot file written by write()
+            date: Date as YYYY-MM-DD
+
+        Returns:
+            list: Records in rank order, empty if the date is not in the snapshot
+
+        Raises:
+            ValueError: If the file is not a snapshot or was written with an unsupported version
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"Snapshot {path} is empty")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with data:
+            header_end = data.find(b"\n") + 1
+            if header_end == 0:
+                raise ValueError(f"Snapshot {path} has no header line")
+            try:
+                header = json.loads(data[:header_end])
+            except ValueError as e:
+                raise ValueError(f"Snapshot {path} has an invalid header: {e}") from e
+            if not isinstance(header, dict) or not isinstance(header.get("dates"), dict):
+                raise ValueError(f"Snapshot {path} has an invalid header")
+            if header.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {header.get('version')}")
+
+            if date not in header["dates"]:
+                return []
+            start, end = header["dates"][date]
+            chunk = data[header_end + start:header_end + end]
+
+        return [json.loads(line) for line in chunk.splitlines()]
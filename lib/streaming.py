@@ -0,0 +1,184 @@
+import os
+import json
+import math
+import tempfile
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from lib.equation import RankingEquation
+from lib import profiling
+
+class StreamingRanker:
+    """
+    Ranks a table that does not fit in memory.
+
+    Rows are read in pages and hashed into a fixed-width feature space while
+    document frequencies are streamed. Pages are spooled to disk, so only two
+    pages and one similarity block are in memory at a time. Scores are
+    written back page by page.
+    """
+
+    def __init__(self, db, build_article, weights, trusted_sources, domain_scores,
+                 memory_budget_mb=256, page_size=1000, n_features=2**20, max_df=0.9, snapshot=None):
+        """
+        Args:
+            db: DatabaseConnection for the articles table
+            build_article: Function turning a row into a RankingEquation (or None to skip it)
+            weights, trusted_sources, domain_scores: Same as RankingEquation.rank_articles
+            memory_budget_mb: Upper bound for the similarity block and page matrices
+            page_size: Maximum rows fetched per request
+            n_features: Width of the hashed feature space
+            max_df: Terms in more than this share of documents are ignored, as in rank_articles
+            snapshot: Optional RankingSnapshot that is offered every scored article
+        """
+        self.db = db
+        self.build_article = build_article
+        self.weights = weights
+        self.trusted_sources = trusted_sources
+        self.domain_scores = domain_scores
+        self.n_features = n_features
+        self.max_df = max_df
+        self.snapshot = snapshot
+
+        # A dense page x page float64 similarity block dominates memory; leave room for
+        # its temporaries and the two sparse pages it is computed from
+        budget_bytes = memory_budget_mb * 1024 * 1024
+        self.page_size = max(1, min(page_size, int(math.sqrt(budget_bytes / 32))))
+
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, stop_words='english', alternate_sign=False, norm=None
+        )
+
+    def _page_path(self, spool_dir, page, kind):
+        return os.path.join(spool_dir, f"page-{page:06d}.{kind}")
+
+    def _spool_pages(self, spool_dir):
+        """
+        First pass: fetches pages, hashes their texts and accumulates document frequencies.
+
+        Returns:
+            tuple: (number of pages, number of documents, document frequency array)
+        """
+        document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        n_documents = 0
+        page = 0
+
+        while True:
+            with profiling.stage(profiling.DB_IO):
+                rows = self.db.fetch_records(limit=self.page_size, offset=page * self.page_size, order_by="id")
+            if not rows:
+                break
+
+            rows = [row for row in rows if isinstance(row.get('full_text'), str)]
+            counts = self.vectorizer.transform([row['full_text'] for row in rows]).tocsr()
+            document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+            n_documents += counts.shape[0]
+
+            sparse.save_npz(self._page_path(spool_dir, page, "npz"), counts)
+            with open(self._page_path(spool_dir, page, "jsonl"), "w") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+
+            print(f"📥 Spooled page {page} ({len(rows)} articles)")
+            page += 1
+
+        return page, n_documents, document_frequency
+
+    def _load_tfidf(self, spool_dir, page, idf):
+        counts = sparse.load_npz(self._page_path(spool_dir, page, "npz"))
+        return normalize(counts.multiply(idf).tocsr())
+
+    def _max_similarities(self, spool_dir, n_pages, idf):
+        """
+        Second pass: blocked all-pairs cosine similarity, keeping only the
+        running maximum per article.
+        """
+        for i in range(n_pages):
+            block = self._load_tfidf(spool_dir, i, idf)
+            max_similarity = np.zeros(block.shape[0])
+
+            for j in range(n_pages):
+                other = block if i == j else self._load_tfidf(spool_dir, j, idf)
+                similarities = (block @ other.T).toarray()
+                if i == j:
+                    np.fill_diagonal(similarities, 0)
+                if similarities.size:
+                    np.maximum(max_similarity, similarities.max(axis=1), out=max_similarity)
+                del similarities
+
+            np.save(self._page_path(spool_dir, i, "npy"), max_similarity)
+            print(f"🔁 Computed uniqueness for page {i + 1}/{n_pages}")
+
+    def _score_and_write(self, spool_dir, n_pages):
+        """Third pass: scores every page and writes the scores back."""
+        update_count = 0
+
+        for page in range(n_pages):
+            with open(self._page_path(spool_dir, page, "jsonl")) as f:
+                rows = [json.loads(line) for line in f]
+            max_similarity = np.load(self._page_path(spool_dir, page, "npy"))
+
+            with profiling.stage(profiling.NLP):
+                articles, similarities, article_rows = [], [], []
+                for row, similarity in zip(rows, max_similarity):
+                    article = self.build_article(row)
+                    if article is not None:
+                        articles.append(article)
+                        similarities.append(similarity)
+                        article_rows.append(row)
+
+                vectorizer, counts, tfidf_matrix = None, None, None
+                if any(article.keyword_mode == 'tfidf' for article in articles):
+                    # Hashed features have no names, so keywords use a page-local vocabulary.
+                    # On a one-article page max_df < 1 would drop below min_df, so allow every term
+                    max_df = self.max_df if len(articles) > 1 else 1.0
+                    try:
+                        vectorizer, counts, tfidf_matrix = RankingEquation.fit_tfidf(
+                            [article.full_text for article in articles], max_df=max_df
+                        )
+                    except ValueError as e:
+                        print(f"⚠️ No keywords for page {page + 1}: {e}")
+                RankingEquation.compute_corpus_features(articles, vectorizer, tfidf_matrix, counts)
+
+            for article, similarity, row in zip(articles, similarities, article_rows):
+                article.uniqueness_score = 1 - similarity
+                article.compute_scores(self.weights, self.trusted_sources, self.domain_scores)
+                if self.snapshot is not None:
+                    self.snapshot.add(article, row)
+                try:
+                    with profiling.stage(profiling.DB_IO):
+                        self.db.update_record(article.id, {"article_score": article.final_score})
+                    update_count += 1
+                except Exception as e:
+                    print(f"❌ Error updating article ID {article.id}: {e}")
+
+            print(f"✅ Scored page {page + 1}/{n_pages} ({len(articles)} articles)")
+
+        return update_count
+
+    def run(self):
+        """
+        Ranks the whole table.
+
+        Returns:
+            int: Number of articles updated
+        """
+        with tempfile.TemporaryDirectory(prefix="ranking-") as spool_dir:
+            n_pages, n_documents, document_frequency = self._spool_pages(spool_dir)
+            if not n_documents:
+                print("No articles found. Exiting.")
+                return 0
+
+            print(f"📋 Spooled {n_documents} articles in {n_pages} pages of up to {self.page_size}")
+
+            # Smooth IDF as in TfidfVectorizer; terms above max_df get no weight
+            idf = np.log((1 + n_documents) / (1 + document_frequency)) + 1
+            idf[document_frequency > self.max_df * n_documents] = 0
+
+            with profiling.stage(profiling.UNIQUENESS):
+                self._max_similarities(spool_dir, n_pages, idf)
+            update_count = self._score_and_write(spool_dir, n_pages)
+
+        print(f"✅ Successfully updated scores for {update_count} articles")
+        return update_count
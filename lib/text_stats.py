@@ -0,0 +1,239 @@
+import re
+import numpy as np
+import textstat
+from sklearn.feature_extraction.text import CountVectorizer
+from textblob.en import sentiment as pattern_lexicon
+from textblob._text import (
+    ABBREVIATIONS, EMOTICONS, PUNCTUATION, RE_ABBR1, RE_ABBR2, RE_ABBR3, RE_EMOTICONS, RE_SARCASM, replacements,
+)
+
+# Same rules textstat uses for lexicon_count/sentence_count
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+SENTENCE_PATTERN = re.compile(r'\b[^.!?]+[.!?]*', re.UNICODE)
+
+# TextBlob's sentiment settings (textblob._text.Sentiment)
+NEGATIONS = ("no", "not", "n't", "never")
+EXCLAMATION_BOOST = 1.25
+SARCASM = "(!)"
+# Punctuation split off the start and end of tokens; periods are only split off the end
+LEADING_PUNCTUATION = tuple(PUNCTUATION.replace(".", ""))
+TRAILING_PUNCTUATION = tuple(PUNCTUATION)
+QUOTES = ("\u201c", "\u201d", "\u2018", "\u2019", "'", '"')
+EMOTICON_POLARITY = {}
+for (_, emoticon_polarity), emoticons in EMOTICONS.items():
+    for emoticon in emoticons:
+        EMOTICON_POLARITY.setdefault(emoticon.lower(), emoticon_polarity)
+
+# Non-word features; they contain characters that never survive punctuation removal
+ASSESSMENT_PREFIX = "="
+SENTENCE_TOKEN = "<s>"
+
+# Flesch reading ease constants for English, as in textstat
+FRE_BASE = 206.835
+FRE_SENTENCE_LENGTH = 1.015
+FRE_SYLLABLES_PER_WORD = 84.6
+
+def legacy_round(values, points):
+    """Vectorized copy of textstat's rounding (half away from zero)."""
+    p = 10 ** points
+    return np.floor(values * p + np.copysign(0.5, values)) / p
+
+class BatchTextStats:
+    """Corpus-level sentiment polarity and Flesch reading ease from a single tokenization pass."""
+
+    def __init__(self, negation_factor=-0.5):
+        self.negation_factor = negation_factor
+        self.lexicon = {}  # word -> (polarity, intensity)
+        self.modifiers = set()  # Adverbs that scale the next word ("very good")
+        for word, scores in pattern_lexicon.items():
+            self.lexicon[word] = (scores[None][0], scores[None][2])
+            if 'RB' in scores:
+                self.modifiers.add(word)
+        self._syllables = {}
+
+    @staticmethod
+    def _sentiment_tokens(text):
+        """
+        Splits a text into the lowercase tokens TextBlob's sentiment analyzer sees.
+
+        A trimmed copy of textblob._text.find_tokens: sentence grouping is
+        skipped since it does not change the tokens sentiment uses.
+        """
+        for contraction, split in replacements.items():
+            text = text.replace(contraction, split)
+        for quote in QUOTES:
+            text = text.replace(quote, f" {quote} ")
+
+        tokens = []
+        for token in text.split():
+            while token.startswith(LEADING_PUNCTUATION):
+                tokens.append(token[0])
+                token = token[1:]
+            tail = []
+            while token.endswith(TRAILING_PUNCTUATION):
+                if token.endswith("..."):
+                    tail.append("...")
+                    token = token[:-3].rstrip(".")
+                elif token.endswith(".") and (token in ABBREVIATIONS or RE_ABBR1.match(token)
+                                                or RE_ABBR2.match(token) or RE_ABBR3.match(token)):
+                    # "U.S." and "a." keep their period
+                    break
+                else:
+                    tail.append(token[-1])
+                    token = token[:-1]
+            if token:
+                tokens.append(token)
+            tokens.extend(reversed(tail))
+
+        joined = " ".join(tokens)
+        if "!" in joined:
+            joined = RE_SARCASM.sub(SARCASM, joined)
+        joined = RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+        return joined.lower().split()
+
+    def _assessments(self, text):
+        """
+        Yields the polarity of every assessment TextBlob would make for the text.
+
+        A copy of textblob._text.Sentiment.assessments for untagged words: a lexicon
+        word, optionally with a preceding modifier ("very good") or negation
+        ("not good"), boosted by following exclamation marks, plus emoticons.
+        """
+        assessments = []  # [polarity, intensity, negated]
+        modifier = None
+        negation = None
+        for word in self._sentiment_tokens(text):
+            entry = self.lexicon.get(word)
+            if entry is not None:
+                polarity, intensity = entry
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    # "very good": the word's polarity scaled by the modifier's intensity
+                    assessments[-1][0] = max(-1.0, min(polarity * assessments[-1][1], 1.0))
+                    assessments[-1][1] = intensity
+                if negation is not None:
+                    assessments[-1][1] = 1.0 / assessments[-1][1]
+                    assessments[-1][2] = True
+                modifier = word if word in self.modifiers else None
+                negation = word if word in NEGATIONS else None
+                continue
+
+            if word in NEGATIONS:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                # A negation carries over one-letter words ("not a good")
+                negation = None
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                # "really not good" negates the modifier's assessment
+                assessments[-1][2] = True
+                negation = None
+            elif modifier and len(word) > 2:
+                # A modifier carries over short words ("really is a good")
+                modifier = None
+
+            if word == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * EXCLAMATION_BOOST, 1.0))
+            if word == SARCASM:
+                assessments.append([0.0, 1.0, False])
+            if not word.isalpha() and len(word) <= 5 and word not in PUNCTUATION:
+                emoticon_polarity = EMOTICON_POLARITY.get(word)
+                if emoticon_polarity is not None:
+                    assessments.append([emoticon_polarity, 1.0, False])
+
+        for polarity, _, negated in assessments:
+            yield polarity * self.negation_factor if negated else polarity
+
+    def _analyze(self, text):
+        """
+        Tokenizes one text the way textstat does and emits the extra
+        features the batch computation needs.
+
+        Yields every word, one token per sentiment assessment keyed by its
+        polarity, and one sentence token for every sentence textstat would
+        count. Keying assessments by polarity instead of by words keeps the
+        vocabulary small.
+        """
+        yield from PUNCTUATION_PATTERN.sub('', text.lower()).split()
+
+        for polarity in self._assessments(text):
+            yield ASSESSMENT_PREFIX + repr(polarity)
+
+        for sentence in SENTENCE_PATTERN.findall(text):
+            if len(PUNCTUATION_PATTERN.sub('', sentence).split()) > 2:
+                yield SENTENCE_TOKEN
+
+    def _syllable_count(self, word):
+        # Counted once per distinct word instead of once per occurrence
+        count = self._syllables.get(word)
+        if count is None:
+            count = textstat.syllable_count(word)
+            self._syllables[word] = count
+        return count
+
+    def _term_weights(self, terms):
+        """Builds the per-term word, sentence, syllable, polarity and assessment vectors."""
+        n_terms = len(terms)
+        is_word = np.ones(n_terms)
+        is_sentence = np.zeros(n_terms)
+        syllables = np.zeros(n_terms)
+        polarity = np.zeros(n_terms)
+        is_assessment = np.zeros(n_terms)
+
+        for j, term in enumerate(terms):
+            if term == SENTENCE_TOKEN:
+                is_word[j] = 0
+                is_sentence[j] = 1
+            elif term.startswith(ASSESSMENT_PREFIX):
+                is_word[j] = 0
+                is_assessment[j] = 1
+                polarity[j] = float(term[len(ASSESSMENT_PREFIX):])
+            else:
+                syllables[j] = self._syllable_count(term)
+
+        return is_word, is_sentence, syllables, polarity, is_assessment
+
+    def compute(self, texts):
+        """
+        Computes text statistics for every text in the corpus.
+
+        Args:
+            texts: List of article texts
+
+        Returns:
+            dict: Arrays keyed by 'polarity', 'readability', 'words', 'sentences' and 'syllables'
+        """
+        vectorizer = CountVectorizer(analyzer=self._analyze, lowercase=False)
+        counts = vectorizer.fit_transform(texts).tocsr()
+        is_word, is_sentence, syllables, polarity, is_assessment = self._term_weights(
+            vectorizer.get_feature_names_out()
+        )
+
+        word_counts = counts @ is_word
+        sentence_counts = np.maximum(1, counts @ is_sentence)
+        syllable_counts = counts @ syllables
+        assessment_counts = counts @ is_assessment
+
+        # Polarity is the mean over assessments, 0 when there are none
+        polarity_scores = np.divide(
+            counts @ polarity, assessment_counts, out=np.zeros(len(texts)), where=assessment_counts > 0
+        )
+
+        # Same rounding steps as textstat.flesch_reading_ease
+        sentence_length = legacy_round(word_counts / sentence_counts, 1)
+        syllables_per_word = np.where(
+            word_counts > 0,
+            legacy_round(np.divide(syllable_counts, word_counts, out=np.zeros(len(texts)), where=word_counts > 0), 1),
+            0.0,
+        )
+        readability = legacy_round(
+            FRE_BASE - FRE_SENTENCE_LENGTH * sentence_length - FRE_SYLLABLES_PER_WORD * syllables_per_word, 2
+        )
+
+        return {
+            "polarity": polarity_scores,
+            "readability": readability,
+            "words": word_counts,
+            "sentences": sentence_counts,
+            "syllables": syllable_counts,
+        }
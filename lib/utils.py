@@ -185,13 +185,14 @@ class DatabaseConnection:
         except Exception as e:
             raise Exception(f"Error deleting data for date {date}: {e}")
     
-    def fetch_records(self, limit=100, offset=0):
+    def fetch_records(self, limit=100, offset=0, order_by=None):
         """
         Fetch records from the database table with pagination.
         
         Args:
             limit (int): Maximum number of records to fetch
             offset (int): Number of records to skip
+            order_by (str): Optional column to order by, needed for stable paging
             
         Returns:
             list: The fetched records
@@ -200,7 +201,10 @@ class DatabaseConnection:
             Exception: If an error occurs during fetching
         """
         try:
-            response = self.supabase.table(self.table_name).select("*").limit(limit).offset(offset).execute()
+            query = self.supabase.table(self.table_name).select("*")
+            if order_by:
+                query = query.order(order_by)
+            response = query.limit(limit).offset(offset).execute()
             return response.data
         except Exception as e:
             raise Exception(f"Error fetching data: {e}")
@@ -226,4 +230,37 @@ class DatabaseConnection:
             response = self.supabase.table(self.table_name).select("*").eq("date", date).execute()
             return response.data
         except Exception as e:
-            raise Exception(f"Error fetching data for date {date}: {e}")
\ No newline at end of file
+            raise Exception(f"Error fetching data for date {date}: {e}")
+    
+    def fetch_changed_since(self, column, value=None, limit=100, after=None):
+        """
+        Fetch records whose change column is at or after a watermark, oldest first.
+        
+        Records are ordered by (column, id) and paged by keyset, so rows that
+        share a change value or change while paging are neither skipped nor
+        returned twice on different pages.
+        
+        Args:
+            column (str): Column that changes on every update, e.g. updated_at
+            value: Watermark to compare against, or None to fetch everything
+            limit (int): Maximum number of records to fetch
+            after (tuple): (column value, id) of the last record of the previous page
+            
+        Returns:
+            list: The fetched records
+            
+        Raises:
+            Exception: If an error occurs during fetching
+        """
+        try:
+            query = self.supabase.table(self.table_name).select("*")
+            if value is not None:
+                query = query.gte(column, value)
+            if after is not None:
+                mark, last_id = after
+                # Values are quoted since timestamps contain PostgREST's reserved characters
+                query = query.or_(f'{column}.gt."{mark}",and({column}.eq."{mark}",id.gt.{last_id})')
+            response = query.order(column).order("id").limit(limit).execute()
+            return response.data
+        except Exception as e:
+            raise Exception(f"Error fetching data changed since {value}: {e}")
\ No newline at end of file
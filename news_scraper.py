@@ -3,6 +3,7 @@ from bs4 import BeautifulSoup
 import datetime
 import json
 import re
+from lib import profiling
 GOOGLE_NEWS_SEARCH_URL = (
     "https://www.google.com/search?q=Donald+Trump&tbm=nws&tbs=cdr:1,cd_min:{},cd_max:{}"
 )
@@ -81,17 +82,29 @@ def fetch_image_from_meta(url):
 
     return ""
 
-def fetch_news_by_date(target_date):
+def fetch_news_by_date(target_date, blob_store=None):
+    """
+    Scrapes Google News results for a single date.
+
+    Args:
+        target_date: The date to fetch news for
+        blob_store: Optional BlobStore; inline base64 thumbnails are written there
+                    and replaced by a short blob:// reference
+
+    Returns:
+        list: Article dicts ready to be inserted
+    """
     formatted_date = target_date.strftime("%m/%d/%Y")
     url = GOOGLE_NEWS_SEARCH_URL.format(formatted_date, formatted_date)
     print("🔍 Search URL:", url)
 
-    response = requests.get(url, headers=HEADERS)
-    soup = BeautifulSoup(response.text, "html.parser")
-    # Google blocks
-    article_blocks = soup.select("div.SoaBEf")
-    if not article_blocks:
-        article_blocks = soup.select("g-card")
+    with profiling.stage(profiling.SCRAPING):
+        response = requests.get(url, headers=HEADERS)
+        soup = BeautifulSoup(response.text, "html.parser")
+        # Google blocks
+        article_blocks = soup.select("div.SoaBEf")
+        if not article_blocks:
+            article_blocks = soup.select("g-card")
 
     news_list = []
 
@@ -130,8 +143,13 @@ def fetch_news_by_date(target_date):
             elif img_tag.get("src", "").startswith("data:image/jpeg;base64,/9j/"):
                 thumb = img_tag["src"]
 
-        # 3. LAST RESORT → fetch OG/Twitter/JSON-LD from article
-        image_url = thumb or (fetch_image_from_meta(link) if link else "")
+        with profiling.stage(profiling.IMAGE_RESOLUTION):
+            # 3. LAST RESORT → fetch OG/Twitter/JSON-LD from article
+            image_url = thumb or (fetch_image_from_meta(link) if link else "")
+
+            # 4. Offload inline base64 thumbnails so rows only carry a reference
+            if blob_store and blob_store.is_data_uri(image_url):
+                image_url = blob_store.put_data_uri(image_url)
 
         news_list.append({
             "title": title,
@@ -6,6 +6,7 @@ import { Strategy as GoogleStrategy, Profile as GoogleProfile, VerifyCallback }
 import dotenv from 'dotenv';
 import bcrypt from 'bcrypt';
 import { supabase } from './supabaseClient';
+import { UserCache } from './userCache';
 
 dotenv.config();
 
@@ -22,6 +23,38 @@ interface User {
   password_hash?: string;
 }
 
+// ✅ Deserialized user cache, so authenticated requests skip the Supabase lookup
+// Falls back to the default for unset, non-numeric or non-positive values
+const positiveIntEnv = (name: string, fallback: number): number => {
+  const raw = process.env[name];
+  if (raw === undefined || raw === '') return fallback;
+  const value = Number(raw);
+  if (!Number.isInteger(value) || value <= 0) {
+    console.warn(`⚠️ Invalid ${name}=${raw}, using ${fallback}`);
+    return fallback;
+  }
+  return value;
+};
+
+const userCache = new UserCache<User>(
+  positiveIntEnv('USER_CACHE_MAX', 1000),
+  positiveIntEnv('USER_CACHE_TTL_MS', 60000)
+);
+
+const loadUserById = async (id: string): Promise<User | null> => {
+  console.log(`🔍 Looking up user ${id} in Supabase`);
+  const { data: users, error } = await supabase
+    .from('users')
+    .select('*')
+    .eq('id', id)
+    .limit(1);
+
+  if (error) {
+    throw error;
+  }
+  return users && users.length > 0 ? (users[0] as User) : null;
+};
+
 // ✅ Google OAuth Setup
 if (!process.env.GOOGLE_CLIENT_ID || !process.env.GOOGLE_CLIENT_SECRET) {
   console.error('❌ Missing Google OAuth credentials in .env');
@@ -75,6 +108,7 @@ passport.use(
         }
 
         const user = data[0] as User;
+        userCache.set(user.id, user);
         console.log(`✅ User ${user.id} upserted successfully`);
         return done(null, user);
       } catch (err) {
@@ -92,29 +126,15 @@ passport.serializeUser((user: User, done) => {
 });
 
 passport.deserializeUser(async (id: string, done) => {
-  console.log("🔓 Deserializing user with ID:", id);
   try {
-    console.log(`🔍 Looking up user ${id} in Supabase`);
-    const { data: users, error } = await supabase
-      .from('users')
-      .select('*')
-      .eq('id', id)
-      .limit(1);
-
-    if (error) {
-      console.error("❌ Supabase error during user deserialization:", error.message);
-      return done(error, null);
-    }
-    
-    if (!users || users.length === 0) {
+    const user = await userCache.get(id, loadUserById);
+    if (!user) {
       console.error("⚠️ User not found during deserialization");
       return done(null, null);
     }
-
-    console.log(`✅ User ${id} deserialized successfully`);
-    done(null, users[0] as User);
+    done(null, user);
   } catch (err) {
-    console.error('❌ Exception in deserializeUser:', err);
+    console.error('❌ Exception in deserializeUser:', err?.message || err);
     done(err, null);
   }
 });
@@ -152,6 +172,9 @@ router.get('/user', (req, res) => {
 
 router.get('/logout', (req, res) => {
   console.log('📣 Logout route accessed');
+  if (req.user) {
+    userCache.invalidate((req.user as User).id);
+  }
   req.logout((err) => {
     if (err) {
       console.error('❌ Logout error:', err);
@@ -214,6 +237,7 @@ router.post('/login', async (req, res) => {
     }
 
     console.log(`✅ Password verified for user ${user.id}, logging in`);
+    userCache.set(user.id, user);
     req.login(user, (err) => {
       if (err) {
         console.error('❌ Login session error:', err);
@@ -262,6 +286,7 @@ router.post('/signup', async (req, res) => {
       return res.status(500).json({ error: 'Signup failed (no user returned)' });
     }
 
+    userCache.set(data[0].id, data[0] as User);
     console.log(`🎉 Signup successful for user ${data[0].id}`);
     return res.status(200).json({ message: 'Signup successful', user: data[0] });
   } catch (err) {
@@ -270,6 +295,14 @@ router.post('/signup', async (req, res) => {
   }
 });
 
+// ✅ User cache metrics
+router.get('/cache-metrics', (req, res) => {
+  if (!req.isAuthenticated?.()) {
+    return res.status(401).json({ error: 'Not authenticated' });
+  }
+  res.json(userCache.getMetrics());
+});
+
 // ✅ All Users
 router.get('/users', async (_req, res) => {
   console.log('📣 Fetching all users');
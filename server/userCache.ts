@@ -0,0 +1,93 @@
+// server/userCache.ts
+
+export interface UserCacheMetrics {
+  hits: number;
+  misses: number;
+  coalesced: number;
+  evictions: number;
+  invalidations: number;
+  size: number;
+}
+
+interface CacheEntry<T> {
+  value: T;
+  expiresAt: number;
+}
+
+// Bounded LRU cache with a TTL. Concurrent lookups for the same key share one load.
+export class UserCache<T> {
+  private entries = new Map<string, CacheEntry<T>>(); // Map keeps insertion order: oldest first
+  private inflight = new Map<string, Promise<T | null>>();
+  private metrics = { hits: 0, misses: 0, coalesced: 0, evictions: 0, invalidations: 0 };
+
+  constructor(private maxEntries: number, private ttlMs: number) {
+    if (!(maxEntries > 0) || !(ttlMs > 0)) {
+      throw new RangeError(`UserCache needs a positive size and TTL, got ${maxEntries} and ${ttlMs}`);
+    }
+  }
+
+  async get(id: string, load: (id: string) => Promise<T | null>): Promise<T | null> {
+    const entry = this.entries.get(id);
+    if (entry && entry.expiresAt > Date.now()) {
+      // Move to the most recently used end
+      this.entries.delete(id);
+      this.entries.set(id, entry);
+      this.metrics.hits++;
+      return entry.value;
+    }
+    if (entry) {
+      this.entries.delete(id);
+    }
+
+    const pending = this.inflight.get(id);
+    if (pending) {
+      this.metrics.coalesced++;
+      return pending;
+    }
+
+    this.metrics.misses++;
+    const promise = load(id).then(
+      (value) => {
+        // Only store if the entry was not invalidated or set while loading
+        if (this.inflight.get(id) === promise) {
+          this.inflight.delete(id);
+          if (value) {
+            this.set(id, value);
+          }
+        }
+        return value;
+      },
+      (err) => {
+        if (this.inflight.get(id) === promise) {
+          this.inflight.delete(id);
+        }
+        throw err;
+      }
+    );
+    this.inflight.set(id, promise);
+    return promise;
+  }
+
+  set(id: string, value: T): void {
+    // A fresher value wins over a load still in flight for the same id
+    this.inflight.delete(id);
+    this.entries.delete(id);
+    this.entries.set(id, { value, expiresAt: Date.now() + this.ttlMs });
+
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value;
+      this.entries.delete(oldest);
+      this.metrics.evictions++;
+    }
+  }
+
+  invalidate(id: string): void {
+    this.entries.delete(id);
+    this.inflight.delete(id);
+    this.metrics.invalidations++;
+  }
+
+  getMetrics(): UserCacheMetrics {
+    return { ...this.metrics, size: this.entries.size };
+  }
+}
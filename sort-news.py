@@ -1,9 +1,17 @@
+import os
+import argparse
+from lib import profiling
 from lib.equation import RankingEquation
+from lib.incremental import IncrementalRanker
+from lib.snapshot import RankingSnapshot
+from lib.streaming import StreamingRanker
 from lib.utils import DatabaseConnection
 
 weights = {'uniqueness': 0.3, 'engagement': 0.25, 'recency': 0.1, 'verified': 0.1, 'content': 0.15, 'legitimacy': 0.2, 'downvote': 0.3}
 trusted_sources = ['BBC', 'Reuters', 'NYT']
 domain_scores = {'bbc.com': 90, 'reuters.com': 85, 'randomblog.com': 40}
+keyword_mode = 'tfidf'  # 'tfidf' reuses the ranking TF-IDF matrix, 'rake' runs RAKE per article
+text_stats_mode = 'batch'  # 'batch' scores sentiment/readability for the whole corpus, 'article' uses TextBlob/textstat per article
 
 def fetch_articles_from_database():
     """
@@ -17,7 +25,8 @@ def fetch_articles_from_database():
         db = DatabaseConnection("news_articles")
         
         # Fetch all records - you may want to limit this if you have many records
-        articles = db.fetch_records(limit=1000)
+        with profiling.stage(profiling.DB_IO):
+            articles = db.fetch_records(limit=1000)
         print(f"📋 Fetched {len(articles)} articles from database")
         return articles
         
@@ -42,7 +51,8 @@ def update_article_scores_in_database(sorted_articles):
         update_count = 0
         for article in sorted_articles:
             # Update the article_score column for each article
-            response = db.update_record(article.id, {"article_score": article.final_score})
+            with profiling.stage(profiling.DB_IO):
+                response = db.update_record(article.id, {"article_score": article.final_score})
             update_count += 1
             print(f"Updated article ID {article.id} with score {article.final_score:.4f}")
         
@@ -53,7 +63,52 @@ def update_article_scores_in_database(sorted_articles):
         print(f"❌ Error updating article scores: {e}")
         return 0
 
-def main():
+def build_article(row):
+    """
+    Builds a RankingEquation from a news_articles row.
+
+    Returns:
+        RankingEquation or None if the row cannot be processed
+    """
+    try:
+        return RankingEquation(
+            id=row['id'],
+            full_text=row['full_text'],
+            title=row['title'],
+            source=row['source'],
+            published_at=row['published_at'],
+            upvotes=row.get('upvote', 0),
+            downvotes=row.get('downvote', 0),
+            shares=row.get('share_count', 0),
+            comments=row.get('comment_count', 0),
+            keyword_mode=keyword_mode,
+            text_stats_mode=text_stats_mode
+        )
+    except Exception as e:
+        print(f"Error processing article ID {row.get('id', 'unknown')}: {e}")
+        return None
+
+def rank(args, snapshot):
+    """Runs the ranking mode selected on the command line."""
+    if args.incremental:
+        ranker = IncrementalRanker(
+            DatabaseConnection("news_articles"), build_article, weights, trusted_sources, domain_scores,
+            args.state_dir, watermark_column=args.watermark_column,
+            page_size=args.page_size, memory_budget_mb=args.memory_mb
+        )
+        ranker.run(rebuild=args.rebuild)
+        return
+
+    if args.stream:
+        ranker = StreamingRanker(
+            DatabaseConnection("news_articles"), build_article, weights, trusted_sources, domain_scores,
+            memory_budget_mb=args.memory_mb, page_size=args.page_size, snapshot=snapshot
+        )
+        ranker.run()
+        if snapshot is not None:
+            snapshot.write(args.snapshot)
+        return
+
     # Fetch articles from database instead of reading CSV
     articles_data = fetch_articles_from_database()
     
@@ -61,24 +116,8 @@ def main():
         print("No articles found. Exiting.")
         return
 
-    article_objects = []
-    for row in articles_data:
-        try:
-            article = RankingEquation(
-                id=row['id'],
-                full_text=row['full_text'],
-                title=row['title'],
-                source=row['source'],
-                published_at=row['published_at'],
-                upvotes=row.get('upvote', 0),
-                downvotes=row.get('downvote', 0),
-                shares=row.get('share_count', 0),
-                comments=row.get('comment_count', 0)
-            )
-            article_objects.append(article)
-        except Exception as e:
-            print(f"Error processing article ID {row.get('id', 'unknown')}: {e}")
-            continue
+    with profiling.stage(profiling.NLP):
+        article_objects = [article for article in map(build_article, articles_data) if article is not None]
 
     print(f"Processing {len(article_objects)} valid articles for ranking")
     
@@ -92,5 +131,48 @@ def main():
     # Update scores in Supabase database
     update_article_scores_in_database(sorted_articles)
 
+    if snapshot is not None:
+        snapshot.add_all(sorted_articles, {row['id']: row for row in articles_data})
+        snapshot.write(args.snapshot)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score articles in the news_articles table.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--stream", action="store_true",
+                      help="Rank page by page with bounded memory instead of loading every article")
+    parser.add_argument("--memory-mb", type=int, default=256,
+                        help="Memory budget for --stream/--incremental similarity blocks (default: 256)")
+    parser.add_argument("--page-size", type=int, default=1000,
+                        help="Maximum rows fetched per request in --stream/--incremental mode (default: 1000)")
+    mode.add_argument("--incremental", action="store_true",
+                      help="Only re-score rows changed since the last incremental run")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="With --incremental, discard the saved state and score every row")
+    parser.add_argument("--state-dir", default=".ranking-state",
+                        help="Where --incremental keeps its watermark and index (default: .ranking-state)")
+    parser.add_argument("--watermark-column", default="updated_at",
+                        help="Column that changes whenever a row changes (default: updated_at)")
+    parser.add_argument("--snapshot",
+                        help="Also write the top ranked articles per date to this JSON lines file")
+    parser.add_argument("--snapshot-top-n", type=int, default=20,
+                        help="Articles per date kept in --snapshot (default: 20)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile CPU and memory per stage and save the results to --profile-dir")
+    parser.add_argument("--profile-dir",
+                        help="Where --profile writes its pstats file and report (default: $PROFILE_DIR or profiles)")
+    args = parser.parse_args()
+
+    if args.rebuild and not args.incremental:
+        parser.error("--rebuild only applies to --incremental")
+    if args.snapshot and args.incremental:
+        parser.error("--snapshot needs every score and cannot be combined with --incremental")
+    if args.profile_dir and not args.profile:
+        parser.error("--profile-dir only applies to --profile")
+    profile_dir = args.profile_dir or os.getenv("PROFILE_DIR", "profiles")
+    snapshot = RankingSnapshot(top_n=args.snapshot_top_n) if args.snapshot else None
+
+    with profiling.profile_run("sort_news", enabled=args.profile, output_dir=profile_dir):
+        rank(args, snapshot)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()